@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import heapq
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Optional
 
+from app.shuffle.models import _MemoSlot
 
-@dataclass
-class TrackStats:
+
+@dataclass(slots=True)
+class TrackStats(_MemoSlot):
     """Lightweight container for metrics about a single track."""
     play_count: int = 0
     skip_count: int = 0
@@ -14,6 +18,10 @@ class TrackStats:
     first_play: Optional[datetime] = None
     last_play: Optional[datetime] = None
 
+    def __post_init__(self):
+        # heat_score() memo, cleared by record_play
+        self._memo = None
+
     def record_play(self, seconds_listened: float, completed: bool) -> None:
         now = datetime.now()
 
@@ -21,6 +29,7 @@ class TrackStats:
             self.first_play = now
 
         self.last_play = now
+        self._memo = None
         self.total_listen_seconds += max(seconds_listened, 0)
         self.play_count += 1
 
@@ -44,16 +53,20 @@ class TrackStats:
         """
         Weighted score representing how 'hot' this track is for the user.
         Can tune these weights later.
+        Cached until the next record_play (set fields directly only before the first call).
         """
         if self.play_count == 0:
             return 0.0
+        if self._memo is not None:
+            return self._memo
 
         score = (
             self.play_count * 1.5 +
             (self.play_count - self.skip_count) * 2.0 +
-            (self.last_play.timestamp() / 10_000_000)  # time influence
+            (self.last_play.timestamp() / 10_000_000 if self.last_play else 0.0)  # time influence
         )
-        return round(score, 2)
+        self._memo = round(score, 2)
+        return self._memo
 
 
 class Analytics:
@@ -64,12 +77,15 @@ class Analytics:
 
     def __init__(self):
         self._stats: Dict[str, TrackStats] = {}
+        # monotonic start time of each track currently playing
+        self._active_starts: Dict[str, float] = {}
 
     def track_started(self, track_id: str) -> None:
         """Called when a track begins playing."""
         # store the timestamp here, end-of-play events use it.
         self._ensure_track(track_id)
-        self._stats[track_id]._current_start = datetime.now()
+        # monotonic float: only used for elapsed math, wall-clock stays in record_play
+        self._active_starts[track_id] = time.monotonic()
 
     def track_finished(self, track_id: str, completed: bool = True) -> None:
         """
@@ -80,15 +96,11 @@ class Analytics:
         if not data:
             return  # Should never happen, but avoid errors
 
-        start_ts: Optional[datetime] = getattr(data, "_current_start", None)
+        start_ts = self._active_starts.pop(track_id, None)
         if start_ts is None:
             return
 
-        seconds = (datetime.now() - start_ts).total_seconds()
-
-        # Clean up the temp field
-        delattr(data, "_current_start")
-
+        seconds = time.monotonic() - start_ts
         data.record_play(seconds_listened=seconds, completed=completed)
 
     # -----------------------------
@@ -99,25 +111,19 @@ class Analytics:
         return self._stats.get(track_id)
 
     def most_played(self, limit: int = 10):
-        return sorted(
-            self._stats.items(),
-            key=lambda x: x[1].play_count,
-            reverse=True
-        )[:limit]
+        # nlargest keeps a limit-sized heap rather than sorting every track;
+        # (value, id, stats) tuples compare in C, no key callback per item
+        data = [(s.play_count, tid, s) for tid, s in self._stats.items()]
+        return [(tid, s) for _, tid, s in heapq.nlargest(limit, data)]
 
     def most_skipped(self, limit: int = 10):
-        return sorted(
-            self._stats.items(),
-            key=lambda x: x[1].skip_count,
-            reverse=True
-        )[:limit]
+        data = [(s.skip_count, tid, s) for tid, s in self._stats.items()]
+        return [(tid, s) for _, tid, s in heapq.nlargest(limit, data)]
 
     def hottest_tracks(self, limit: int = 10):
-        return sorted(
-            self._stats.items(),
-            key=lambda x: x[1].heat_score(),
-            reverse=True
-        )[:limit]
+        # heat_score() is cached on TrackStats, so this is one read per track
+        data = [(s.heat_score(), tid, s) for tid, s in self._stats.items()]
+        return [(tid, s) for _, tid, s in heapq.nlargest(limit, data)]
 
     # -----------------------------
     # Internal
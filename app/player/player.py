@@ -50,8 +50,9 @@ class Player:
         self.time_scale = float(time_scale) if time_scale and time_scale > 0 else 1.0
         self._cmd_q: SimpleQueue[str] = SimpleQueue()
         self._running = False
-        self._lock = threading.Lock()
-        self._paused = False
+        # set == playing, cleared while paused (read by the stdin thread to toggle p)
+        self._playing = threading.Event()
+        self._playing.set()
 
     # -------------------------
     # public control API
@@ -95,11 +96,14 @@ class Player:
     # internals
     # -------------------------
     def _ensure_tracks(self, items: Iterable[Track]) -> List[Track]:
+        # playback only iterates the list, so a list of Tracks needs no copy
+        if isinstance(items, list) and (not items or isinstance(items[0], Track)):
+            return items
         items = list(items)
         if not items:
             return []
         if isinstance(items[0], Track):
-            return items[:]  # copy
+            return items
         return normalize_tracks(items)
 
     def _play_single_track(self, track: Track) -> bool:
@@ -111,55 +115,54 @@ class Player:
         # scaled down for demos/tests
         dur_secs = (dur_ms / 1000.0) * self.time_scale
 
+        # resolve once, these are reused by every analytics call below
+        tid = track.id or track.uri or "(unknown)"
+        name = track.name
+        artist = track.main_artist_name()
+
         # start analytics
-        self.analytics.track_started(track.id or track.uri or "(unknown)")
-
-        print(f"▶ Now playing: {track.name} — {track.main_artist_name()}  [{int(dur_secs)}s demo]")
-        start = time.time()
-        elapsed = 0.0
-
-        while elapsed < dur_secs:
-            # check for commands every 0.2s
-            try:
-                cmd = self._cmd_q.get(timeout=0.2)
-            except Empty:
-                cmd = None
-
-            if cmd is not None:
-                if cmd == PlayerCommand.SKIP:
-                    # treat as incomplete play
-                    print("→ Skipped.")
-                    self.analytics.track_finished(track.id or track.uri or "(unknown)", completed=False)
-                    return True
-                if cmd == PlayerCommand.PAUSE:
-                    with self._lock:
-                        self._paused = True
-                    print("|| paused (press 'p' to resume)")
-                elif cmd == PlayerCommand.RESUME:
-                    with self._lock:
-                        self._paused = False
-                    print("▶ resumed")
-                elif cmd == PlayerCommand.QUIT:
-                    print("⏹ stopping playback.")
-                    # record partial listening as incomplete
-                    self.analytics.track_finished(track.id or track.uri or "(unknown)", completed=False)
-                    return False  # signal stop
-
-            # paused state
-            if self._paused:
-                time.sleep(0.2)
-                # don't advance elapsed while paused
-                start += 0.2
-                elapsed = time.time() - start
-                continue
-
-            # sleep a little to be responsive
-            time.sleep(0.2)
-            elapsed = time.time() - start
+        self.analytics.track_started(tid)
+
+        print(f"▶ Now playing: {name} — {artist}  [{int(dur_secs)}s demo]")
+        deadline = time.monotonic() + dur_secs
+
+        while True:
+            if not self._playing.is_set():
+                # nothing advances while paused: block until the next command
+                # and push the deadline back by however long we waited
+                paused_at = time.monotonic()
+                cmd = self._cmd_q.get()
+                deadline += time.monotonic() - paused_at
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # wake up on the next command, or once the track has run out
+                try:
+                    cmd = self._cmd_q.get(timeout=remaining)
+                except Empty:
+                    break
+
+            if cmd == PlayerCommand.SKIP:
+                # treat as incomplete play
+                print("→ Skipped.")
+                self.analytics.track_finished(tid, completed=False)
+                return True
+            if cmd == PlayerCommand.PAUSE:
+                self._playing.clear()
+                print("|| paused (press 'p' to resume)")
+            elif cmd == PlayerCommand.RESUME:
+                self._playing.set()
+                print("▶ resumed")
+            elif cmd == PlayerCommand.QUIT:
+                print("⏹ stopping playback.")
+                # record partial listening as incomplete
+                self.analytics.track_finished(tid, completed=False)
+                return False  # signal stop
 
         # finished normally
-        print("✓ Completed:", track.name)
-        self.analytics.track_finished(track.id or track.uri or "(unknown)", completed=True)
+        print("✓ Completed:", name)
+        self.analytics.track_finished(tid, completed=True)
         return True
 
     def _command_input_loop(self):
@@ -181,11 +184,10 @@ class Player:
                     self._cmd_q.put(PlayerCommand.SKIP)
                 elif v == "p":
                     # toggle pause/resume depending on state
-                    with self._lock:
-                        if self._paused:
-                            self._cmd_q.put(PlayerCommand.RESUME)
-                        else:
-                            self._cmd_q.put(PlayerCommand.PAUSE)
+                    if self._playing.is_set():
+                        self._cmd_q.put(PlayerCommand.PAUSE)
+                    else:
+                        self._cmd_q.put(PlayerCommand.RESUME)
                 elif v == "q":
                     self._cmd_q.put(PlayerCommand.QUIT)
                     break
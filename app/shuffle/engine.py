@@ -12,8 +12,11 @@ Design notes:
 """
 
 from typing import List, Iterable, Union, Optional
+import heapq
 import random
-from collections import defaultdict
+from math import log
+from array import array
+from collections import defaultdict, deque
 
 # local import (relative path expected in package)
 from app.shuffle.models import Track, normalize_tracks
@@ -31,8 +34,8 @@ class ShuffleEngine:
         """
         self.min_artist_gap = max(0, int(min_artist_gap))
         self.weighted = bool(weighted)
-        if rng_seed is not None:
-            random.seed(rng_seed)
+        # per-engine generator: seeding never touches the global random module state
+        self._rng = random.Random(rng_seed)
 
     # -----------------------
     # public entry
@@ -51,130 +54,182 @@ class ShuffleEngine:
         if not tracks:
             return []
 
+        # shuffle + constraints work on index permutations over the track list
+        # (ints and one int64 artist array), Tracks are only looked up at the end
         if self.weighted:
-            shuffled = self._weighted_shuffle(tracks)
+            order = self._weighted_shuffle(tracks)
         else:
-            shuffled = self._fisher_yates(tracks)
+            order = self._fisher_yates(len(tracks))
 
-        # enforce artist spacing and other constraints
-        out = self._enforce_artist_gap(shuffled, gap=self.min_artist_gap)
-        return out
+        # enforce artist spacing and other constraints (a gap of 1 can never be broken)
+        if self.min_artist_gap > 1 and len(order) > 1:
+            order = self._shuffle_indices(self._artist_ids_array(tracks), order, self.min_artist_gap)
+        return [tracks[i] for i in order]
 
     # -----------------------
     # input handling
     # -----------------------
     def _ensure_tracks(self, items: Iterable[TrackLike]) -> List[Track]:
         # check: if first element is a Track then assume whole iterable is Tracks
+        # a list of Tracks is used as-is: the shuffles below never mutate their input
+        if isinstance(items, list) and (not items or isinstance(items[0], Track)):
+            return items
         items = list(items)
         if not items:
             return []
         first = items[0]
         if isinstance(first, Track):
             # assume all Tracks (duck-typing)
-            return [it for it in items]  # shallow copy
+            return items
         # else assume raw spotify payloads -> normalize
         return normalize_tracks(items)
 
     # -----------------------
     # shuffles
     # -----------------------
-    def _fisher_yates(self, tracks: List[Track]) -> List[Track]:
-        """Classic in-place Fisher-Yates, returns a new list copy."""
-        arr = list(tracks)
-        for i in range(len(arr) - 1, 0, -1):
-            j = random.randint(0, i)
-            arr[i], arr[j] = arr[j], arr[i]
-        return arr
-
-    def _weighted_shuffle(self, tracks: List[Track]) -> List[Track]:
+    def _fisher_yates(self, n: int) -> List[int]:
+        """
+        Classic in-place Fisher-Yates over range(n), returns the permutation.
+        random.shuffle is the same algorithm but draws each index via _randbelow
+        directly, skipping randint()'s argument checks on every step.
+        """
+        order = list(range(n))
+        self._rng.shuffle(order)
+        return order
+
+    def _weighted_shuffle(self, tracks: List[Track]) -> List[int]:
         """
         Lightweight weighted approach.
         - Uses Track.popularity (0-100) if present.
         - Higher popularity slightly increases chance to appear earlier.
-        Not a perfect weighted permutation algorithm but chosen bc its simple and explainable. 
+        Weighted permutation via Efraimidis-Spirakis keys: sorting by Exp(1) / weight is
+        the same as repeatedly drawing the next track with probability proportional to
+        weight = 1 / (120 - popularity), in one O(n log n) sort.
         Could be altered or changed according to (user) preference. 
+        Returns the permutation as indices into tracks.
         """
-        scored = []
-        for t in tracks:
-            pop = t.popularity if isinstance(t.popularity, int) else 50
-            # combine deterministic factor with randomness
-            score = random.random() * (120 - pop)  # lower score = earlier
-            scored.append((score, t))
-        scored.sort(key=lambda x: x[0])
-        return [t for _, t in scored]
+        rand = self._rng.random
+        # Exp(1) sample scaled by 1/weight, lower score = earlier (1 - u keeps log's arg > 0)
+        scores = [
+            -log(1.0 - rand()) * (120 - (t.popularity if isinstance(t.popularity, int) else 50))
+            for t in tracks
+        ]
+        # sort indices by a C-level key instead of building (score, track) tuples + lambda
+        return sorted(range(len(tracks)), key=scores.__getitem__)
 
     # -----------------------
     # constraints
     # -----------------------
     def _enforce_artist_gap(self, tracks: List[Track], gap: int) -> List[Track]:
+        """Apply the artist-gap pass (see _shuffle_indices) to tracks in their given order."""
+        if gap <= 1 or len(tracks) < 2:
+            return tracks[:]
+        order = self._shuffle_indices(self._artist_ids_array(tracks), range(len(tracks)), gap)
+        return [tracks[i] for i in order]
+
+    def _shuffle_indices(self, aids: array, order: Iterable[int], gap: int) -> List[int]:
         """
-        Post-process to reduce occurrences of same artist too close together.
+        Post-process so tracks by the same artist end up at least 'gap' positions apart.
+        Works purely on ints: 'order' is a permutation of track indices and aids[i] is
+        track i's interned main artist; returns the adjusted permutation.
         Strategy:
-        - Walk through shuffled list, place items into result.
-        - If an item's main artist was seen within 'gap' positions, attempt to insert it later
-          at the first safe position (greedy).
-        - If no safe position exists, append to the end (best effort).
+        - aids comes from _artist_ids_array: each main artist interned into a small int once.
+        - Bucket the shuffled indices per artist, so each artist's own tracks keep their
+          shuffled order.
+        - At every position, place the earliest-shuffled track among artists whose gap
+          has passed, so the result stays as close to the shuffle as the gap allows
+          (weighted runs keep their popularity bias).
+        - Only when the rest gets tight, i.e. the biggest artists need every remaining
+          slot ((most_left - 1) * gap + artists_with_that_many >= slots_left), switch to
+          the ready artist with the most tracks left. That keeps the gap satisfiable
+          whenever some valid order exists, without front-loading big artists.
+        - Artists placed within the last 'gap' positions wait in a cooldown queue.
+        - If nobody is ready the list is infeasible: place the artist seen longest ago
+          (best effort).
         """
-        if gap <= 0:
-            return tracks[:]
+        n_artists = max(aids, default=-1) + 1
+        if n_artists == len(aids) - aids.count(-1):
+            # every known artist appears once, nothing can conflict
+            return list(order)
+
+        # shuffled (rank, index) pairs per artist; unknown artists are treated as unique
+        # so they don't over-constrain
+        buckets: dict = defaultdict(deque)
+        unknown = n_artists
+        for rank, i in enumerate(order):
+            aid = aids[i]
+            if aid < 0:
+                aid = unknown
+                unknown += 1
+            buckets[aid].append((rank, i))
+
+        n = len(aids)
+        # per_count[r]: artists with r tracks left; most_left only ever shrinks
+        per_count = [0] * (n + 1)
+        for q in buckets.values():
+            per_count[len(q)] += 1
+        most_left = max(len(q) for q in buckets.values())
+
+        # artists free to play now, in two lazily cleaned heaps:
+        # (rank of next track, artist) and (-tracks left, rank of next track, artist).
+        # An entry is current while its artist is ready and still has that next track.
+        ready = set(buckets)
+        by_rank = [(q[0][0], aid) for aid, q in buckets.items()]
+        by_count = [(-len(q), q[0][0], aid) for aid, q in buckets.items()]
+        heapq.heapify(by_rank)
+        heapq.heapify(by_count)
+        # (position the artist is free again, artist); positions only grow, so FIFO order
+        cooldown: deque = deque()
+        res: List[int] = []
+
+        for pos in range(n):
+            while cooldown and cooldown[0][0] <= pos:
+                aid = cooldown.popleft()[1]
+                q = buckets[aid]
+                ready.add(aid)
+                heapq.heappush(by_rank, (q[0][0], aid))
+                heapq.heappush(by_count, (-len(q), q[0][0], aid))
+
+            while not per_count[most_left]:
+                most_left -= 1
+            tight = (most_left - 1) * gap + per_count[most_left] >= n - pos
+            heap = by_count if tight else by_rank
+
+            aid = None
+            while heap:
+                entry = heapq.heappop(heap)
+                cand = entry[-1]
+                if cand in ready and buckets[cand][0][0] == entry[-2]:
+                    aid = cand
+                    break
+            if aid is None:
+                # infeasible: nothing fits, cooldown front is the least recently seen
+                aid = cooldown.popleft()[1]
+            ready.discard(aid)
+
+            q = buckets[aid]
+            per_count[len(q)] -= 1
+            res.append(q.popleft()[1])
+            per_count[len(q)] += 1
+            if q:
+                cooldown.append((pos + gap, aid))
 
-        res: List[Track] = []
-        # last index seen for each artist id (use first artist id if available)
-        last_seen: dict = {}
+        return res
 
+    def _artist_ids_array(self, tracks: List[Track]) -> array:
+        """
+        Map each track's main artist to a small int in one pass.
+        Returns a compact int64 array (8 bytes/track), -1 for unknown artists.
+        """
+        interned: dict = {}
+        out = array("q")
         for t in tracks:
             artist = self._main_artist_id(t)
             if artist is None:
-                # treat unknown artists as unique so don't over-constrain
-                res.append(t)
-                continue
-
-            last = last_seen.get(artist)
-            if last is None or (len(res) - last) >= gap:
-                # safe to append
-                last_seen[artist] = len(res)
-                res.append(t)
-                continue
-
-            # conflict: need to find a later safe slot
-            insert_at = self._find_safe_spot(res, last_seen, artist, gap)
-            if insert_at >= len(res):
-                # no safe spot found — just append to end
-                last_seen[artist] = len(res)
-                res.append(t)
+                out.append(-1)
             else:
-                res.insert(insert_at, t)
-                # update last_seen indices: for simplicity, reset this artist, and shift others if needed
-                # shortcut: recompute last_seen for the artists we care about
-                # (not the most optimized, but ok for playlists up to few thousands)
-                self._recompute_last_seen(res, last_seen)
-
-        return res
-
-    def _find_safe_spot(self, arr: List[Track], last_seen: dict, artist: str, gap: int) -> int:
-        """
-        Find first index >= 0 where placing the track would satisfy the gap.
-        We try scanning from current length down to length (i.e after last items).
-        """
-        # try positions after current end first (fast path)
-        for i in range(len(arr)):
-            # placing at i means the last occurrence must be at <= i - gap
-            last = last_seen.get(artist)
-            if last is None or (i - last) >= gap:
-                # ensure that placing here doesn't violate other artists constraints:
-                # for the artist at this spot (if any), verify that this insertion
-                # will not break its own gap relative to its previous occurrences 
-                return i
-        # if nothing sensible found, return end
-        return len(arr)
-
-    def _recompute_last_seen(self, arr: List[Track], last_seen: dict):
-        """Recompute last_seen mapping for the current result array."""
-        last_seen.clear()
-        for idx, t in enumerate(arr):
-            aid = self._main_artist_id(t)
-            if aid is not None:
-                last_seen[aid] = idx
+                out.append(interned.setdefault(artist, len(interned)))
+        return out
 
     # -----------------------
     # helpers
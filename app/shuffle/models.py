@@ -17,11 +17,23 @@ from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Any, Iterable, Optional
 
 
-@dataclass
-class Track:
+class _MemoSlot:
+    """
+    Base for slotted dataclasses that memoize a derived value (Track.to_dict,
+    analytics.TrackStats.heat_score). '_memo' lives outside the dataclass fields, so
+    it isn't an __init__ argument, isn't carried over by dataclasses.replace() and
+    doesn't show up in asdict()/repr/eq. None means "not computed yet"; subclasses
+    reset it in __post_init__.
+    """
+    __slots__ = ("_memo",)
+
+
+@dataclass(slots=True)
+class Track(_MemoSlot):
     """
     Minimal representation of a track used across the app.
-    The 'raw' field keeps the original Spotify payload for fields we don't normalize yet.
+    The 'raw' field keeps the original Spotify payload for fields we don't normalize yet
+    (only filled when built with keep_raw=True, full payloads are large).
     """
     id: Optional[str]
     uri: Optional[str]
@@ -33,6 +45,7 @@ class Track:
     raw: Dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self):
+        self._memo = None
         # small sanity fixes so we don't have to guard everywhere
         if self.artists is None:
             self.artists = []
@@ -53,6 +66,10 @@ class Track:
 
     def to_dict(self) -> Dict[str, Any]:
         # provide a plain-serializable dict useful for local caches/debugging
+        # built once and reused: treat the returned dict as read-only, and don't change
+        # the track's fields after calling this (build a new Track/replace() instead)
+        if self._memo is not None:
+            return self._memo
         d = {
             "id": self.id,
             "uri": self.uri,
@@ -61,25 +78,32 @@ class Track:
             "popularity": self.popularity,
             "duration_ms": self.duration_ms,
         }
+        self._memo = d
         return d
 
     # factory methods -----------------------------------------------------
     @classmethod
-    def from_spotify_item(cls, item: Dict[str, Any]) -> "Track":
+    def from_spotify_item(cls, item: Dict[str, Any], keep_raw: bool = False) -> "Track":
         """
         Accepts one of:
          - item from playlists/{id}/tracks -> e.g. {"track": {...}, "added_at": "..."}
          - track object (already inside 'track') -> {...}
          - audio-features like objects (partial)
         Returns a Track instance.
+        keep_raw: hold on to the original payload in .raw (album art, markets, etc.)
         """
         # if envelope (playlist item)
         track_obj = item.get("track") if isinstance(item, dict) and "track" in item else item
 
         if track_obj is None:
             # defensive: weird empty track object
-            return cls(id=None, uri=None, name="(Unknown)", artists=[], raw=item)
+            return cls(id=None, uri=None, name="(Unknown)", artists=[], raw=item if keep_raw else {})
 
+        return cls._from_track_obj(track_obj, keep_raw)
+
+    @classmethod
+    def _from_track_obj(cls, track_obj: Dict[str, Any], keep_raw: bool = False) -> "Track":
+        """Build from an already unwrapped track object (no envelope/None probing)."""
         # some endpoints include only a subset, be defensive
         track_id = track_obj.get("id")
         uri = track_obj.get("uri")
@@ -97,7 +121,7 @@ class Track:
             popularity=popularity,
             duration_ms=duration_ms,
             album=album,
-            raw=track_obj,
+            raw=track_obj if keep_raw else {},
         )
 
     @classmethod
@@ -119,7 +143,7 @@ class Track:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Playlist:
     id: Optional[str]
     name: str
@@ -145,27 +169,50 @@ class Playlist:
 # -------------------------
 # small helpers
 # -------------------------
-def normalize_tracks(items: Iterable[Dict[str, Any]]) -> List[Track]:
+def normalize_tracks(items: Iterable[Dict[str, Any]], keep_raw: bool = False) -> List[Track]:
     """
     Given an iterable of Spotify playlist items (or raw tracks),
     return a list of Track objects.
+    Original payloads are dropped unless keep_raw=True.
     """
-    out = []
-    for it in items:
-        try:
-            tr = Track.from_spotify_item(it)
-            out.append(tr)
-        except Exception:
-            # defensive: preserve raw item in case of odd payloads
-            out.append(Track(id=None, uri=None, name="(Unknown)", artists=[], raw=it))
+    items = items if isinstance(items, list) else list(items)
+    if not items:
+        return []
+
+    out: List[Track] = []
+    append = out.append
+    from_obj = Track._from_track_obj
+    try:
+        for it in items:
+            # one dict probe per item: unwraps playlist envelopes ({"track": {...}}) and
+            # passes bare track objects through, even when a list mixes the two
+            obj = it.get("track", it)
+            if obj is not None:
+                append(from_obj(obj, keep_raw))
+            else:
+                # removed/unavailable track in an envelope: rare path
+                append(Track.from_spotify_item(it, keep_raw=keep_raw))
+    except Exception:
+        # odd payload somewhere: redo item by item so one bad entry doesn't sink the rest
+        return [_normalize_item(it, keep_raw) for it in items]
     return out
 
 
-def playlist_from_spotify_payload(payload: Dict[str, Any]) -> Playlist:
+def _normalize_item(item: Any, keep_raw: bool = False) -> Track:
+    """General per-item builder for payloads the fast path can't handle."""
+    try:
+        return Track.from_spotify_item(item, keep_raw=keep_raw)
+    except Exception:
+        # defensive: preserve raw item in case of odd payloads
+        return Track(id=None, uri=None, name="(Unknown)", artists=[], raw=item)
+
+
+def playlist_from_spotify_payload(payload: Dict[str, Any], keep_raw: bool = False) -> Playlist:
     """
     Builds a playlist model from a Spotify playlist object (or from a 'playlist' endpoint)
     expecting keys like: id, name, owner, tracks (could be paginated).
     Intentionally permissive.
+    keep_raw: keep the playlist and track payloads on .raw (off by default to save memory)
     """
     pid = payload.get("id")
     name = payload.get("name") or "(Unnamed)"
@@ -184,5 +231,5 @@ def playlist_from_spotify_payload(payload: Dict[str, Any]) -> Playlist:
         # sometimes get payloads with no tracks: leave empty
         raw_tracks = []
 
-    tracks = normalize_tracks(raw_tracks)
-    return Playlist(id=pid, name=name, owner_id=owner, tracks=tracks, raw=payload)
+    tracks = normalize_tracks(raw_tracks, keep_raw=keep_raw)
+    return Playlist(id=pid, name=name, owner_id=owner, tracks=tracks, raw=payload if keep_raw else {})
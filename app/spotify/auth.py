@@ -23,11 +23,11 @@ import hashlib
 import json
 import os
 import secrets
-import threading
 import time
 from dataclasses import dataclass
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlparse
 
 import requests
 
@@ -44,7 +44,7 @@ def _b64_urlsafe_no_pad(b: bytes) -> str:
     return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
 
 
-def _sha256_hex(s: str) -> bytes:
+def _sha256_digest(s: str) -> bytes:
     return hashlib.sha256(s.encode("ascii")).digest()
 
 
@@ -65,35 +65,62 @@ class TokenSet:
 class _RedirectHandler(BaseHTTPRequestHandler):
     """
     Small handler that captures the 'code' query param from Spotify redirect
-    and stores it on the server class for the caller to pick up.
+    and stores it on the server instance (auth_code/auth_state) for the caller to pick up.
     """
     server_version = "SpotifyPKCEServer/0.1"
-    code = None
-    state = None
+    # per-connection read timeout: an idle client (e.g. a browser preconnect) would
+    # otherwise block the single-threaded server forever
+    timeout = 10
 
     def do_GET(self):
         # naive parsing for small dev server
-        from urllib.parse import urlparse, parse_qs
-
         parsed = urlparse(self.path)
         qs = parse_qs(parsed.query)
+        if "code" not in qs and "error" not in qs:
+            # not the redirect (favicon etc.), keep waiting for it
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.server.redirected = True
         if "error" in qs:
             self.send_response(200)
             self.end_headers()
             self.wfile.write(b"Authorization failed or was cancelled. You may close this window.")
-            _RedirectHandler.code = None
+            self.server.auth_code = None
             return
 
-        code = qs.get("code", [None])[0]
-        state = qs.get("state", [None])[0]
-        _RedirectHandler.code = code
-        _RedirectHandler.state = state
+        self.server.auth_code = qs.get("code", [None])[0]
+        self.server.auth_state = qs.get("state", [None])[0]
 
         self.send_response(200)
         self.end_headers()
         self.wfile.write(b"Authorization complete. You may close this tab/window.")
 
 
+def _wait_for_redirect(srv: HTTPServer, timeout: float = 120.0) -> tuple:
+    """
+    Serve srv (built with _RedirectHandler) in this thread until the redirect lands or
+    'timeout' seconds pass, then close it. Returns (code, state), code is None on
+    error/timeout.
+    """
+    srv.auth_code = None
+    srv.auth_state = None
+    srv.redirected = False
+    # srv.timeout bounds the wait for a connection, the handler timeout each read
+    deadline = time.monotonic() + timeout
+    try:
+        while not srv.redirected:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            srv.timeout = remaining
+            srv.handle_request()
+    finally:
+        srv.server_close()
+    return srv.auth_code, srv.auth_state
+
+
 class SpotifyAuth:
     """
     Manages PKCE-based auth.
@@ -108,17 +135,34 @@ class SpotifyAuth:
         self.redirect_uri = redirect_uri
         self.token_file = token_file
         self._tokens: Optional[TokenSet] = None
+        # what was last written to token_file, lets save_tokens skip redundant writes
+        self._last_saved_refresh: Optional[str] = None
+        self._last_save_ts = 0.0
 
     # Token storage -------------------------------------
     def save_tokens(self):
         if not self._tokens:
             return
+        # same refresh token written moments ago: the file is still good enough
+        # (a stale access token on disk just gets refreshed on the next run)
+        now = time.time()
+        if self._tokens.refresh_token == self._last_saved_refresh and (now - self._last_save_ts) < 60:
+            return
+        tmp_file = self.token_file + ".tmp"
         try:
-            with open(self.token_file, "w", encoding="utf8") as fh:
+            with open(tmp_file, "w", encoding="utf8") as fh:
                 json.dump(self._tokens.to_json(), fh)
+            # atomic swap so a crash mid-write never leaves a truncated token file
+            os.replace(tmp_file, self.token_file)
+            self._last_saved_refresh = self._tokens.refresh_token
+            self._last_save_ts = now
         except Exception:
-            # don't make this fatal, best effort persist
-            pass
+            # don't make this fatal, best effort persist; but don't leave live tokens
+            # behind in a half-written tmp file either
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
 
     def load_tokens(self) -> bool:
         if not os.path.exists(self.token_file):
@@ -133,13 +177,14 @@ class SpotifyAuth:
 
     # PKCE helpers -----------------------------------------------
     @staticmethod
-    def _make_code_verifier(length: int = 64) -> str:
+    def _make_code_verifier(length: int = 96) -> str:
         # per RFC-7636: 43-128 chars from [A-Z / a-z / 0-9 / "-" / "." / "_" / "~"]
-        return _b64_urlsafe_no_pad(secrets.token_bytes(length))[:128]
+        # token_urlsafe is already unpadded url-safe base64 (96 bytes -> 128 chars)
+        return secrets.token_urlsafe(length)[:128]
 
     @staticmethod
     def _make_code_challenge(verifier: str) -> str:
-        digest = _sha256_hex(verifier)
+        digest = _sha256_digest(verifier)
         return _b64_urlsafe_no_pad(digest)
 
     # Auth flow ------------------------------------------------ 
@@ -163,14 +208,12 @@ class SpotifyAuth:
             "code_challenge": challenge,
             "state": state,
         }
-        from urllib.parse import urlencode
-
         auth_url = AUTHORIZE_URL + "?" + urlencode(params)
         print("\nOpen this URL in your browser and authorize the app:\n")
         print(auth_url + "\n")
         print("Waiting for the redirect... (will timeout in ~120s)\n")
 
-        # small local server to handle single GET request
+        # small local server to catch the redirect
         parsed = self.redirect_uri.split(":")
         if parsed[1].startswith("//"):
             # very simple port extraction
@@ -179,20 +222,7 @@ class SpotifyAuth:
         else:
             host, port = "127.0.0.1", 8888
 
-        srv = HTTPServer((host, port), _RedirectHandler)
-        # run single handle_request on separate thread to time out
-        thr = threading.Thread(target=srv.handle_request, daemon=True)
-        thr.start()
-        thr.join(timeout=120)
-        try:
-            srv.server_close()
-        except Exception:
-            pass
-
-        code = _RedirectHandler.code
-        got_state = _RedirectHandler.state
-        _RedirectHandler.code = None
-        _RedirectHandler.state = None
+        code, got_state = _wait_for_redirect(HTTPServer((host, port), _RedirectHandler))
 
         if not code:
             raise RuntimeError("Authorization code not received (timed out or denied).")
@@ -1,10 +1,16 @@
 # app/spotify/client.py
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.core.settings import settings
 from app.spotify.auth import TokenManager
-from app.shuffle.engine import ShuffleEngine
 
 
 class SpotifyClient:
@@ -15,49 +21,131 @@ class SpotifyClient:
     """
 
     BASE_URL = "https://api.spotify.com/v1"
-
-    def __init__(self):
+    PAGE_SIZE = 100
+    # only what Track.from_spotify_item reads (+ total for paging): skips
+    # available_markets, album images, external ids etc. in every page
+    TRACK_FIELDS = "total,items(track(id,uri,name,artists(id,name),album(id,name),popularity,duration_ms))"
+    # concurrent page fetches for large playlists
+    MAX_PAGE_WORKERS = 8
+    # playlists whose items are kept in memory between calls
+    PLAYLIST_CACHE_SIZE = 16
+
+    def __init__(self, rate_limit=None):
+        """
+        rate_limit: optional cap on requests/second. Requests are spaced evenly so
+        concurrent page fetches don't burst into 429s (which the session also retries).
+        """
         self.token_mgr = TokenManager()
         self._token = None
+        # monotonic deadline for the cached token (only compared against time.monotonic())
         self._token_expiry = 0
+        # serialises token (re)loads/refreshes across the page-fetch workers
+        self._token_lock = threading.Lock()
+        # one session for every call: keep-alive + urllib3 connection pooling.
+        # The bearer token lives in session.headers (set per token in _get_token).
+        self.session = requests.Session()
+        # transient failures/rate limits are retried by urllib3 (GETs only by default,
+        # POSTs aren't idempotent); the final response still goes through raise_for_status
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.rate_limit = rate_limit
+        self._rate_lock = threading.Lock()
+        # monotonic time the next request may start at
+        self._next_slot = 0.0
+
+        # playlist_id -> (snapshot_id, items), least recently used first
+        self._playlist_cache = {}
+
+    def close(self):
+        """Release the pooled HTTP connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def _get_token(self):
         # reuse existing token if still valid
-        if self._token and time.time() < self._token_expiry:
+        if self._token and time.monotonic() < self._token_expiry:
             return self._token
 
-        data = self.token_mgr.load_token()
-        if not data:
-            raise RuntimeError("No Spotify token found. Run the auth flow first.")
+        with self._token_lock:
+            # another worker may have loaded it while we waited
+            if self._token and time.monotonic() < self._token_expiry:
+                return self._token
 
-        self._token = data["access_token"]
-        self._token_expiry = time.time() + (data.get("expires_in", 3500))
+            data = self.token_mgr.load_token()
+            if not data:
+                raise RuntimeError("No Spotify token found. Run the auth flow first.")
 
-        return self._token
+            self._token = data["access_token"]
+            self._token_expiry = time.monotonic() + (data.get("expires_in", 3500))
+            # set once per token, every session request then carries it
+            self.session.headers["Authorization"] = f"Bearer {self._token}"
 
-    def _headers(self):
-        token = self._get_token()
-        return {"Authorization": f"Bearer {token}"}
+            return self._token
+
+    def _throttle(self):
+        if not self.rate_limit:
+            return
+        # reserve the next slot under the lock, sleep outside it
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate_limit
+        if wait > 0:
+            time.sleep(wait)
+
+    def _refresh_token(self, stale=None):
+        """
+        stale: the token the failed request was sent with. When several workers hit a
+        401 at once only the first refreshes; the rest see the token already changed.
+        """
+        with self._token_lock:
+            if stale is not None and self._token != stale:
+                return
+            self.token_mgr.refresh_token()
+            # drop the cached token so the retry picks up (and re-sets) the refreshed one
+            self._token = None
 
     def _get(self, path, params=None):
         url = f"{self.BASE_URL}/{path.lstrip('/')}"
-        r = requests.get(url, headers=self._headers(), params=params)
+        token = self._get_token()
+        self._throttle()
+        r = self.session.get(url, params=params)
 
         # If expired refresh and retry once
         if r.status_code == 401:
-            self.token_mgr.refresh_token()
-            r = requests.get(url, headers=self._headers(), params=params)
+            self._refresh_token(token)
+            self._get_token()
+            self._throttle()
+            r = self.session.get(url, params=params)
 
         r.raise_for_status()
         return r.json()
 
     def _post(self, path, payload=None):
         url = f"{self.BASE_URL}/{path.lstrip('/')}"
-        r = requests.post(url, headers=self._headers(), json=payload)
+        token = self._get_token()
+        self._throttle()
+        r = self.session.post(url, json=payload)
 
         if r.status_code == 401:
-            self.token_mgr.refresh_token()
-            r = requests.post(url, headers=self._headers(), json=payload)
+            self._refresh_token(token)
+            self._get_token()
+            self._throttle()
+            r = self.session.post(url, json=payload)
 
         r.raise_for_status()
         return r.json() if r.text else None
@@ -72,43 +160,56 @@ class SpotifyClient:
         return self._get("me/playlists", params={"limit": limit})
 
     def get_playlist_tracks(self, playlist_id):
-        # Spotify is paginated so fetch until done
-        # new/include??:
-        engine = ShuffleEngine(min_artist_gap=3, weighted=False)
-        shuffled_tracks = engine.run(raw_items)  # raw_items can be playlist item dicts
-        
-        """Or:
-        
-        from app.shuffle.models import normalize_tracks # at top
-        tracks = normalize_tracks(raw_items)
-        shuffled_tracks = engine.run(tracks)  # Track objects
+        """All items of a playlist, served from memory while its snapshot_id is unchanged."""
+        # snapshot_id only changes when the playlist is edited, so one tiny request
+        # tells us whether the cached items are still current
+        meta = self._get(f"playlists/{playlist_id}", params={"fields": "snapshot_id"})
+        snapshot = meta.get("snapshot_id")
+        cached = self._playlist_cache.pop(playlist_id, None)
+        if cached is None or not snapshot or cached[0] != snapshot:
+            cached = (snapshot, list(self.iter_playlist_tracks(playlist_id)))
+        if snapshot:
+            self._playlist_cache[playlist_id] = cached
+            if len(self._playlist_cache) > self.PLAYLIST_CACHE_SIZE:
+                del self._playlist_cache[next(iter(self._playlist_cache))]
+        # copy so callers can't mutate what's cached
+        return list(cached[1])
+
+    def iter_playlist_tracks(self, playlist_id):
+        """
+        Yield playlist items page by page, in playlist order.
+        Lets callers start normalizing before the last page lands, and each page's
+        dicts can be freed once consumed: only MAX_PAGE_WORKERS pages are fetched ahead,
+        and closing the generator early cancels the rest.
         """
-        uris = [t.to_spotify_uri() for t in shuffled_tracks if t.to_spotify_uri()]
-        # finish check of new additions
-        
-        
-        items = []
         url = f"playlists/{playlist_id}/tracks"
-        params = {"limit": 100}
+        params = {"limit": self.PAGE_SIZE, "fields": self.TRACK_FIELDS}
         data = self._get(url, params=params)
-        items.extend(data.get("items", []))
-
-        next_url = data.get("next")
-
-        # follow pagination manually (simplest approach)
-        while next_url:
-            # Spotify provides full URL here - direct GET
-            r = requests.get(next_url, headers=self._headers())
-            if r.status_code == 401:
-                self.token_mgr.refresh_token()
-                r = requests.get(next_url, headers=self._headers())
-
-            r.raise_for_status()
-            data = r.json()
-            items.extend(data.get("items", []))
-            next_url = data.get("next")
 
-        return items
+        # first page tells us the total, so every other offset is known up front:
+        # fetch them concurrently instead of hopping 'next' links one RTT at a time
+        offsets = iter(range(self.PAGE_SIZE, data.get("total", 0), self.PAGE_SIZE))
+
+        def fetch(offset):
+            return self._get(url, params={**params, "offset": offset})
+
+        pool = ThreadPoolExecutor(max_workers=self.MAX_PAGE_WORKERS)
+        try:
+            # at most MAX_PAGE_WORKERS pages in flight, collected in submission order
+            # (playlist order); a new one is only queued as an older one is consumed
+            window = deque(pool.submit(fetch, o) for o in islice(offsets, self.MAX_PAGE_WORKERS))
+            yield from data.get("items", [])
+            del data
+            while window:
+                page = window.popleft().result()
+                nxt = next(offsets, None)
+                if nxt is not None:
+                    window.append(pool.submit(fetch, nxt))
+                yield from page.get("items", [])
+        finally:
+            # caller stopped early (or a fetch failed): drop the queued pages instead of
+            # waiting for them, in-flight ones finish in the background and are discarded
+            pool.shutdown(wait=False, cancel_futures=True)
 
     def reorder_playlist(self, playlist_id, uris):
         """
@@ -0,0 +1,102 @@
+# tests/test_auth.py
+import json
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import HTTPServer
+
+from app.spotify.auth import SpotifyAuth, TokenSet, _RedirectHandler, _wait_for_redirect
+
+
+def _auth(tmp_path, access="a1", refresh="r1"):
+    auth = SpotifyAuth("client", token_file=str(tmp_path / "tokens.json"))
+    auth._tokens = TokenSet(access_token=access, refresh_token=refresh, expires_at=0.0)
+    return auth
+
+
+def _saved(auth):
+    with open(auth.token_file, encoding="utf8") as fh:
+        return json.load(fh)
+
+
+def test_save_tokens_skips_rewrite_with_same_refresh_token(tmp_path):
+    auth = _auth(tmp_path)
+    auth.save_tokens()
+    auth._tokens = TokenSet(access_token="a2", refresh_token="r1", expires_at=0.0)
+    auth.save_tokens()
+    assert _saved(auth)["access_token"] == "a1"
+
+
+def test_save_tokens_writes_rotated_refresh_token(tmp_path):
+    auth = _auth(tmp_path)
+    auth.save_tokens()
+    auth._tokens = TokenSet(access_token="a2", refresh_token="r2", expires_at=0.0)
+    auth.save_tokens()
+    assert _saved(auth) == {"access_token": "a2", "refresh_token": "r2", "expires_at": 0.0}
+    assert os.listdir(tmp_path) == ["tokens.json"]
+
+
+def test_save_tokens_failure_leaves_no_tmp_file(tmp_path, monkeypatch):
+    auth = _auth(tmp_path)
+    auth.save_tokens()
+
+    def broken_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", broken_replace)
+    auth._tokens = TokenSet(access_token="a2", refresh_token="r2", expires_at=0.0)
+    auth.save_tokens()
+    assert os.listdir(tmp_path) == ["tokens.json"]
+    assert _saved(auth)["refresh_token"] == "r1"
+
+
+def _redirect_server():
+    srv = HTTPServer(("127.0.0.1", 0), _RedirectHandler)
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+def _get_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            return resp.status
+    except urllib.error.HTTPError as err:
+        return err.code
+
+
+def test_redirect_waits_past_idle_client_and_favicon(monkeypatch):
+    monkeypatch.setattr(_RedirectHandler, "timeout", 0.2)
+    srv, base = _redirect_server()
+    statuses = []
+
+    def browser():
+        # preconnect that never sends a request, then the favicon, then the redirect
+        idle = socket.create_connection(srv.server_address)
+        statuses.append(_get_status(base + "/favicon.ico"))
+        statuses.append(_get_status(base + "/callback?code=abc&state=xyz"))
+        idle.close()
+
+    thr = threading.Thread(target=browser)
+    thr.start()
+    assert _wait_for_redirect(srv, timeout=10) == ("abc", "xyz")
+    thr.join()
+    assert statuses == [404, 200]
+
+
+def test_redirect_error_returns_without_code():
+    srv, base = _redirect_server()
+    thr = threading.Thread(target=_get_status, args=(base + "/callback?error=access_denied",))
+    thr.start()
+    start = time.monotonic()
+    assert _wait_for_redirect(srv, timeout=10) == (None, None)
+    assert time.monotonic() - start < 5
+    thr.join()
+
+
+def test_redirect_gives_up_at_deadline():
+    srv, _ = _redirect_server()
+    start = time.monotonic()
+    assert _wait_for_redirect(srv, timeout=0.3) == (None, None)
+    assert time.monotonic() - start < 2
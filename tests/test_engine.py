@@ -33,3 +33,76 @@ def test_artist_gap_respected():
     # each consecutive difference must be >= 3
     for a, b in zip(positions, positions[1:]):
         assert (b - a) >= 3
+
+
+def test_artist_gap_defers_conflicting_tracks():
+    # three A tracks up front: each has to wait until the gap has passed
+    tracks = [Track(id=f"a{i}", uri=None, name=f"a{i}", artists=[{"id": "A", "name": "A"}]) for i in range(3)]
+    tracks += [Track(id=f"o{i}", uri=None, name=f"o{i}", artists=[{"id": f"O{i}", "name": f"O{i}"}]) for i in range(6)]
+    out = ShuffleEngine(min_artist_gap=3)._enforce_artist_gap(tracks, gap=3)
+    assert sorted(t.id for t in out) == sorted(t.id for t in tracks)
+    positions = [i for i, t in enumerate(out) if t.artists[0]["id"] == "A"]
+    assert positions == [0, 3, 6]
+
+
+def test_artist_gap_met_whenever_possible():
+    # A B C A B C A B D A is valid; the scheduler must find an order like it every time
+    tracks = [
+        Track(id=f"t{i}", uri=None, name=f"t{i}", artists=[{"id": a, "name": a}])
+        for i, a in enumerate("AAAABBBCCD")
+    ]
+    for seed in range(200):
+        out = ShuffleEngine(min_artist_gap=3, rng_seed=seed).run(tracks)
+        assert sorted(t.id for t in out) == sorted(t.id for t in tracks)
+        last = {}
+        for pos, t in enumerate(out):
+            aid = t.artists[0]["id"]
+            assert pos - last.get(aid, -3) >= 3
+            last[aid] = pos
+
+
+def test_artist_gap_keeps_order_random():
+    # plenty of room for the gap: the big artist must not be pinned to the front
+    tracks = [
+        Track(id=f"t{i}", uri=None, name=f"t{i}", artists=[{"id": a, "name": a}])
+        for i, a in enumerate(["A"] * 10 + ["B"] * 6 + ["C"] * 4 + [f"x{j}" for j in range(20)])
+    ]
+    firsts = {ShuffleEngine(min_artist_gap=3, rng_seed=seed).run(tracks)[0].artists[0]["id"] for seed in range(50)}
+    assert len(firsts) > 5
+
+
+def test_gap_of_one_keeps_plain_shuffle():
+    tracks = [
+        Track(id=f"t{i}", uri=None, name=f"t{i}", artists=[{"id": a, "name": a}])
+        for i, a in enumerate("AAAABBBCCD")
+    ]
+    for seed in range(20):
+        plain = [t.id for t in ShuffleEngine(min_artist_gap=0, rng_seed=seed).run(tracks)]
+        assert [t.id for t in ShuffleEngine(min_artist_gap=1, rng_seed=seed).run(tracks)] == plain
+    assert ShuffleEngine()._enforce_artist_gap(tracks, gap=1) == tracks
+
+
+def test_seeded_engines_are_isolated():
+    import random
+
+    random.seed(0)
+    expected_global = random.random()
+
+    random.seed(0)
+    a = [t.id for t in ShuffleEngine(rng_seed=7).run(SAMPLE_TRACKS)]
+    b = [t.id for t in ShuffleEngine(rng_seed=7, weighted=True).run(SAMPLE_TRACKS)]
+    assert a == [t.id for t in ShuffleEngine(rng_seed=7).run(SAMPLE_TRACKS)]
+    assert b == [t.id for t in ShuffleEngine(rng_seed=7, weighted=True).run(SAMPLE_TRACKS)]
+    # constructing/running engines must leave the global generator alone
+    assert random.random() == expected_global
+
+
+def test_weighted_shuffle_favours_popular_tracks():
+    hit = Track(id="hit", uri=None, name="Hit", artists=[{"id": "a1"}], popularity=100)
+    deep_cut = Track(id="deep", uri=None, name="Deep", artists=[{"id": "a2"}], popularity=0)
+    firsts = sum(
+        ShuffleEngine(weighted=True, rng_seed=seed).run([hit, deep_cut])[0].id == "hit"
+        for seed in range(500)
+    )
+    # weights 1/20 vs 1/120 -> the hit leads ~6/7 of the time
+    assert 0.8 < firsts / 500 < 0.92
@@ -29,3 +29,31 @@ def test_normalize_tracks_and_playlist():
     assert pl.owner_id == "me"
     assert len(pl.tracks) == 1
     assert pl.tracks[0].name == "Test Song"
+
+def test_normalize_tracks_mixed_shapes():
+    bare = {"id": "bare1", "uri": "spotify:track:bare1", "name": "Bare", "artists": []}
+    tracks = normalize_tracks([bare, SAMPLE_ITEM, {"track": None}])
+    assert [t.id for t in tracks] == ["bare1", "track123", None]
+    assert tracks[1].name == "Test Song"
+
+def test_to_dict_is_built_once():
+    t = Track.from_spotify_item(SAMPLE_ITEM)
+    d = t.to_dict()
+    assert d == {
+        "id": "track123",
+        "uri": "spotify:track:track123",
+        "name": "Test Song",
+        "artists": [{"id": "art1", "name": "Artist One"}],
+        "popularity": 42,
+        "duration_ms": 210000,
+    }
+    assert t.to_dict() is d
+
+def test_raw_payload_only_kept_on_request():
+    assert Track.from_spotify_item(SAMPLE_ITEM).raw == {}
+    assert Track.from_spotify_item(SAMPLE_ITEM, keep_raw=True).raw is SAMPLE_ITEM["track"]
+    pl_payload = {"id": "pl1", "name": "My Playlist", "tracks": [SAMPLE_ITEM]}
+    assert playlist_from_spotify_payload(pl_payload).raw == {}
+    kept = playlist_from_spotify_payload(pl_payload, keep_raw=True)
+    assert kept.raw is pl_payload
+    assert kept.tracks[0].raw is SAMPLE_ITEM["track"]